@@ -2,19 +2,18 @@ import sys
 import os
 import shutil
 import requests
+from requests.adapters import HTTPAdapter
+import struct
 import tempfile
-import pygame
+import time
 import threading
-import pyperclip
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QTextEdit, QPushButton, 
                              QSlider, QCheckBox, QFrame, QGraphicsDropShadowEffect, QComboBox,
                              QSpinBox, QDoubleSpinBox, QGroupBox, QInputDialog)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QPoint
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QPoint, QStringListModel, QTimer, QUrl
 from PyQt6.QtGui import QColor
-import sounddevice as sd
-import soundfile as sf
-import numpy as np
+from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 
 # Configuration
 SERVER_URL = "http://localhost:5000/v1/audio/speech"
@@ -23,17 +22,91 @@ PATHS_URL = "http://localhost:5000/v1/system/paths"
 DEFAULT_FONT = "Segoe UI"
 OUTPUT_DIR = os.path.abspath("saved_outputs")
 TEMP_DIR = os.path.abspath("temp")
-
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
-
-if not os.path.exists(TEMP_DIR):
-    os.makedirs(TEMP_DIR)
+VOICES_DIR = os.path.abspath("voices")
+ENABLE_SHADOW = False # Drop shadow around the window; costly to repaint while dragging
+STREAM_CHUNK_SIZE = 128 * 1024 # Bytes per iter_content read when streaming PCM
+WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI') # RIFF/WAVE + fmt + data chunk headers
+
+# Application style sheet (built once at import rather than per window)
+STYLESHEET = """
+    QWidget { font-family: 'Segoe UI', sans-serif; color: #E0E0E0; }
+    
+    #BgFrame {
+        background-color: rgba(30, 30, 30, 240); 
+        border-radius: 15px;
+        border: 1px solid #404040;
+    }
+    
+    #TitleLabel { font-size: 18px; font-weight: bold; color: #FFFFFF; }
+    
+    QPushButton#TitleBtn {
+        background: transparent; border: none; font-size: 16px; width: 30px;
+    }
+    QPushButton#TitleBtn:hover { background-color: #404040; border-radius: 5px; }
+    QPushButton#CloseBtn:hover { background-color: #C42B1C; color: white; border-radius: 5px; }
+    
+    #Sidebar { border-right: 1px solid #404040; margin-right: 10px; }
+    
+    QGroupBox {
+        border: 1px solid #404040; border-radius: 5px; margin-top: 10px; padding-top: 10px; font-weight: bold;
+    }
+    QGroupBox::title { subcontrol-origin: margin; left: 10px; padding: 0 3px; }
+    
+    QSlider::groove:horizontal {
+        border: 1px solid #3A3939; height: 8px; background: #201F1F; margin: 2px 0; border-radius: 4px;
+    }
+    QSlider::handle:horizontal {
+        background: #007ACC; border: 1px solid #007ACC; width: 18px; margin: -2px 0; border-radius: 9px;
+    }
+    
+    QComboBox, QSpinBox, QDoubleSpinBox {
+        background-color: #252526; border: 1px solid #3E3E42; border-radius: 5px; padding: 5px; color: #F0F0F0;
+    }
+    QComboBox::drop-down { border: none; }
+    QComboBox::down-arrow { image: none; border-left: 1px solid #3E3E42; width: 10px; }
+    
+    
+    QPushButton#SmallBtn {
+        background-color: transparent; border: 1px solid #404040; border-radius: 4px; padding: 4px; color: #CCCCCC;
+    }
+    QPushButton#SmallBtn:hover { background-color: #333333; }
+    
+    #TextInput {
+        background-color: #252526; border: 1px solid #3E3E42; border-radius: 8px;
+        font-size: 14px; padding: 10px; color: #F0F0F0; selection-background-color: #264F78;
+    }
+    
+    QPushButton#ActionBtn {
+        background-color: #0E639C; color: white; border-radius: 6px; 
+        padding: 10px 20px; font-size: 14px; font-weight: bold;
+    }
+    QPushButton#ActionBtn:hover { background-color: #1177BB; }
+    QPushButton#ActionBtn:pressed { background-color: #0D5685; }
+    
+    #StatusLabel { color: #808080; margin-top: 5px; }
+"""
+
+# Shared HTTP session so every call reuses the pooled keep-alive connection to the server
+SESSION = requests.Session()
+SESSION.mount("http://localhost", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+SESSION.headers.update({"Connection": "keep-alive"})
+
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+os.makedirs(TEMP_DIR, exist_ok=True)
+os.makedirs(VOICES_DIR, exist_ok=True)
+
+def write_wav_pcm16(path, pcm, samplerate):
+    """Write mono 16-bit PCM bytes to `path` as a canonical 44-byte-header WAV."""
+    header = WAV_HEADER.pack(b'RIFF', 36 + len(pcm), b'WAVE', b'fmt ', 16, 1, 1,
+                             samplerate, samplerate * 2, 2, 16, b'data', len(pcm))
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(pcm)
 
 class AudioWorker(QThread):
     finished = pyqtSignal(bool, str) # Success, Message/Path
     
-    def __init__(self, text, cfg_value, timesteps, voice, retry_badcase, retry_max, retry_threshold, stream=False):
+    def __init__(self, text, cfg_value, timesteps, voice, retry_badcase, retry_max, retry_threshold, stream=False, dest_path=None):
         super().__init__()
         self.text = text
         self.cfg_value = cfg_value
@@ -43,8 +116,10 @@ class AudioWorker(QThread):
         self.retry_max = retry_max
         self.retry_threshold = retry_threshold
         self.stream = stream
+        self.dest_path = dest_path # Final location (autosave); temp file if None
 
     def run(self):
+        path = None
         try:
             payload = {
                 "input": self.text,
@@ -59,35 +134,51 @@ class AudioWorker(QThread):
                 "retry_badcase_ratio_threshold": self.retry_threshold
             }
             
-            response = requests.post(SERVER_URL, json=payload, stream=self.stream)
+            # Always stream the body so neither branch holds the whole response in memory
+            response = SESSION.post(SERVER_URL, json=payload, stream=True)
             
             if response.status_code == 200:
-                # Save to temp file
-                fd, path = tempfile.mkstemp(suffix=".wav", dir=TEMP_DIR)
-                os.close(fd) # Close file descriptor, sf.write opens it by name or handle
+                if self.dest_path:
+                    # Download beside the destination and move it into place only once complete
+                    fd, path = tempfile.mkstemp(suffix=".part", dir=os.path.dirname(self.dest_path) or ".")
+                else:
+                    # Save to temp file
+                    fd, path = tempfile.mkstemp(suffix=".wav", dir=TEMP_DIR)
+                os.close(fd) # Close file descriptor, the file is reopened by name
                 
                 if self.stream:
-                    # Collect PCM chunks and convert to WAV
-                    pcm_data = []
-                    for chunk in response.iter_content(chunk_size=4096):
+                    # Collect PCM chunks into a single buffer and convert to WAV
+                    # Pre-size when the server tells us the length; slice assignment
+                    # writes in place and only grows the buffer if it overflows.
+                    buf = bytearray(int(response.headers.get('Content-Length', 0)))
+                    offset = 0
+                    for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
                         if chunk:
-                            pcm_data.append(chunk)
-                    
-                    raw_bytes = b"".join(pcm_data)
-                    # Convert raw bytes to numpy array
-                    audio_array = np.frombuffer(raw_bytes, dtype=np.int16)
-                    
-                    # Write as WAV using soundfile
-                    sf.write(path, audio_array, 44100) # VoxCPM 1.5 uses 44.1kHz.
+                            buf[offset:offset + len(chunk)] = chunk
+                            offset += len(chunk)
+                    del buf[offset - offset % 2:] # Drop any trailing partial sample
+
+                    # The stream is already the PCM payload; just prepend a WAV header
+                    write_wav_pcm16(path, buf, 44100) # VoxCPM 1.5 uses 44.1kHz.
                 else:
+                    # Copy the WAV straight from the socket to disk
                     with open(path, 'wb') as f:
-                        f.write(response.content)
+                        shutil.copyfileobj(response.raw, f, length=STREAM_CHUNK_SIZE)
 
+                if self.dest_path:
+                    os.replace(path, self.dest_path)
+                    path = self.dest_path
                 self.finished.emit(True, path)
             else:
                 self.finished.emit(False, f"Error {response.status_code}: {response.text}")
                 
         except Exception as e:
+            # Don't leave a truncated download behind
+            if path is not None:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
             self.finished.emit(False, str(e))
 
 class RecorderWorker(QThread):
@@ -98,26 +189,42 @@ class RecorderWorker(QThread):
         self.filename = filename
         self.text = text # Transcript to save
         self.samplerate = samplerate
-        self.recording = []
         self.is_recording = True
         self.stream = None
+        self._stop = threading.Event()
 
     def run(self):
         try:
-            # Callback for sounddevice
-            def callback(indata, frames, time, status):
-                if self.is_recording:
-                    self.recording.append(indata.copy())
-                else:
-                    raise sd.CallbackStop
+            import sounddevice as sd
+            import soundfile as sf
 
-            with sd.InputStream(samplerate=self.samplerate, channels=1, callback=callback):
-                while self.is_recording:
-                    self.msleep(100)
-            
-            # Save Audio
-            audio_data = np.concatenate(self.recording, axis=0)
-            sf.write(self.filename, audio_data, self.samplerate)
+            # Record into a temp file beside the target, so a failed take never
+            # truncates an existing voice. The .part suffix keeps the server from listing it.
+            fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=os.path.dirname(self.filename) or ".")
+            os.close(fd)
+        except Exception as e:
+            self.finished.emit(False, str(e))
+            return
+
+        try:
+            # Save Audio: blocks are written straight to the WAV as they arrive
+            with sf.SoundFile(tmp_path, mode='w', samplerate=self.samplerate,
+                              channels=1, format='WAV', subtype='PCM_16') as wav_file:
+                # Callback for sounddevice
+                def callback(indata, frames, time, status):
+                    if self.is_recording:
+                        wav_file.write(indata)
+                    else:
+                        raise sd.CallbackStop
+
+                # Capture int16 natively so blocks match the PCM_16 file with no conversion
+                with sd.InputStream(samplerate=self.samplerate, channels=1, dtype='int16',
+                                    blocksize=2048, latency='low', callback=callback):
+                    # Sleep until stop() is called
+                    self._stop.wait()
+
+            # The take succeeded, swap it in over any previous recording
+            os.replace(tmp_path, self.filename)
 
             # Save Transcript
             txt_path = os.path.splitext(self.filename)[0] + ".txt"
@@ -127,11 +234,36 @@ class RecorderWorker(QThread):
             self.finished.emit(True, self.filename)
             
         except Exception as e:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
             self.finished.emit(False, str(e))
 
     def stop(self):
         self.is_recording = False
+        self._stop.set()
         
+class VoicesWorker(QThread):
+    finished = pyqtSignal(int, list, str) # Status code (0 if unreachable), Voices, ETag
+
+    def __init__(self, etag=None):
+        super().__init__()
+        self.etag = etag
+
+    def run(self):
+        try:
+            # Conditional GET: the server answers 304 if the voice list is unchanged
+            headers = {'If-None-Match': self.etag} if self.etag else {}
+            response = SESSION.get(VOICES_URL, headers=headers, timeout=1)
+            if response.status_code == 200:
+                voices = response.json().get("voices", ["default"])
+                self.finished.emit(200, voices, response.headers.get('ETag', ''))
+            else:
+                self.finished.emit(response.status_code, [], '')
+        except Exception:
+            self.finished.emit(0, [], '')
+
 class ModernWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -140,7 +272,9 @@ class ModernWindow(QMainWindow):
         self.resize(800, 600)
         
         # Audio Init
-        pygame.mixer.init()
+        self.player = QMediaPlayer(self)
+        self.audio_output = QAudioOutput(self)
+        self.player.setAudioOutput(self.audio_output)
         
         # Central Widget & Layout
         self.central_widget = QWidget()
@@ -163,8 +297,14 @@ class ModernWindow(QMainWindow):
         self.setup_ui()
         self.setup_styles()
         
-        # Initial Data
-        self.fetch_voices()
+        # Initial Data (fetched after the first paint)
+        self.voices_worker = None
+        self._voices_fetching = False
+        self._voices_refetch = False
+        self._voices_etag = None
+        self._voices_cache = None
+        self._select_voice = None
+        QTimer.singleShot(0, self.fetch_voices)
         
         # Drag Logic
         self.old_pos = None
@@ -172,23 +312,53 @@ class ModernWindow(QMainWindow):
         # Random Generation Flag
         self.is_random_generation = False
 
-    def fetch_voices(self):
-        try:
-            # Try to fetch from server if running
-            response = requests.get(VOICES_URL, timeout=1)
-            if response.status_code == 200:
-                voices = response.json().get("voices", ["default"])
+    def fetch_voices(self, select=None):
+        # Voice to auto-select once the refreshed list arrives
+        if select:
+            self._select_voice = select
+
+        if self._voices_fetching:
+            # A fetch is in flight; run another once it lands so new files are seen
+            self._voices_refetch = True
+            return
+
+        if self.voices_worker:
+            self.voices_worker.wait()
+        self._voices_fetching = True
+        self.voices_worker = VoicesWorker(self._voices_etag)
+        self.voices_worker.finished.connect(self._apply_voices)
+        self.voices_worker.start()
+
+    def _apply_voices(self, status, voices, etag):
+        self._voices_fetching = False
+
+        if status == 200:
+            self._voices_etag = etag or None
+            if voices != self._voices_cache:
+                self._voices_cache = voices
                 current = self.combo_voice.currentText()
-                self.combo_voice.clear()
-                self.combo_voice.addItems(voices)
+                # Swap the whole list in one model reset instead of N addItem calls
+                self.combo_voice.blockSignals(True)
+                self.voices_model.setStringList(voices)
+                self.combo_voice.blockSignals(False)
                 # Restore selection if exists
-                if current in voices:
-                    self.combo_voice.setCurrentText(current)
-            else:
-                if self.combo_voice.count() == 0: self.combo_voice.addItem("default")
-        except:
-             # Server might be down or starting, keep default
-             if self.combo_voice.count() == 0: self.combo_voice.addItem("default")
+                index = self.combo_voice.findText(current)
+                if index >= 0:
+                    self.combo_voice.setCurrentIndex(index)
+        elif status != 304:
+            # Server might be down or starting, keep default
+            if self.combo_voice.count() == 0: self.combo_voice.addItem("default")
+
+        if self._voices_refetch:
+            self._voices_refetch = False
+            self.fetch_voices()
+            return
+
+        if self._select_voice:
+            index = self.combo_voice.findText(self._select_voice)
+            if index >= 0:
+                self.combo_voice.setCurrentIndex(index)
+            self._select_voice = None
 
     def setup_ui(self):
         # Header
@@ -223,29 +393,36 @@ class ModernWindow(QMainWindow):
         sidebar_layout = QVBoxLayout(sidebar)
         
         # Controls Group
-        lbl_cfg = QLabel("CFG Scale: 2.0")
+        # Slider labels are refreshed at most once per frame while dragging
+        self._label_timer = QTimer(self)
+        self._label_timer.setSingleShot(True)
+        self._label_timer.setInterval(16)
+        self._label_timer.timeout.connect(self._update_slider_labels)
+
+        self.lbl_cfg = QLabel("CFG Scale: 2.0")
         self.slider_cfg = QSlider(Qt.Orientation.Horizontal)
         self.slider_cfg.setRange(1, 100) # 0.1 - 10.0
         self.slider_cfg.setValue(20)
-        self.slider_cfg.valueChanged.connect(lambda v: lbl_cfg.setText(f"CFG Scale: {v/10.0:.1f}"))
-        sidebar_layout.addWidget(lbl_cfg)
+        self.slider_cfg.valueChanged.connect(self._on_slider_changed)
+        sidebar_layout.addWidget(self.lbl_cfg)
         sidebar_layout.addWidget(self.slider_cfg)
         
         sidebar_layout.addSpacing(15)
         
-        lbl_steps = QLabel("Inference Steps: 10")
+        self.lbl_steps = QLabel("Inference Steps: 10")
         self.slider_steps = QSlider(Qt.Orientation.Horizontal)
         self.slider_steps.setRange(1, 50)
         self.slider_steps.setValue(10)
-        self.slider_steps.valueChanged.connect(lambda v: lbl_steps.setText(f"Inference Steps: {v}"))
-        sidebar_layout.addWidget(lbl_steps)
+        self.slider_steps.valueChanged.connect(self._on_slider_changed)
+        sidebar_layout.addWidget(self.lbl_steps)
         sidebar_layout.addWidget(self.slider_steps)
         
         sidebar_layout.addSpacing(15)
         
         lbl_voice = QLabel("Voice Profile:")
         self.combo_voice = QComboBox()
-        self.combo_voice.addItem("default")
+        self.voices_model = QStringListModel(["default"], self.combo_voice)
+        self.combo_voice.setModel(self.voices_model)
         sidebar_layout.addWidget(lbl_voice)
         sidebar_layout.addWidget(self.combo_voice)
         
@@ -376,71 +553,24 @@ class ModernWindow(QMainWindow):
         content_layout.addLayout(main_area)
         self.bg_layout.addLayout(content_layout)
 
+    def _on_slider_changed(self, _):
+        if not self._label_timer.isActive():
+            self._label_timer.start()
+
+    def _update_slider_labels(self):
+        self.lbl_cfg.setText("CFG Scale: %.1f" % (self.slider_cfg.value() * 0.1))
+        self.lbl_steps.setText("Inference Steps: %d" % self.slider_steps.value())
+
     def setup_styles(self):
-        self.setStyleSheet("""
-            QWidget { font-family: 'Segoe UI', sans-serif; color: #E0E0E0; }
-            
-            #BgFrame {
-                background-color: rgba(30, 30, 30, 240); 
-                border-radius: 15px;
-                border: 1px solid #404040;
-            }
-            
-            #TitleLabel { font-size: 18px; font-weight: bold; color: #FFFFFF; }
-            
-            QPushButton#TitleBtn {
-                background: transparent; border: none; font-size: 16px; width: 30px;
-            }
-            QPushButton#TitleBtn:hover { background-color: #404040; border-radius: 5px; }
-            QPushButton#CloseBtn:hover { background-color: #C42B1C; color: white; border-radius: 5px; }
-            
-            #Sidebar { border-right: 1px solid #404040; margin-right: 10px; }
-            
-            QGroupBox {
-                border: 1px solid #404040; border-radius: 5px; margin-top: 10px; padding-top: 10px; font-weight: bold;
-            }
-            QGroupBox::title { subcontrol-origin: margin; left: 10px; padding: 0 3px; }
-            
-            QSlider::groove:horizontal {
-                border: 1px solid #3A3939; height: 8px; background: #201F1F; margin: 2px 0; border-radius: 4px;
-            }
-            QSlider::handle:horizontal {
-                background: #007ACC; border: 1px solid #007ACC; width: 18px; margin: -2px 0; border-radius: 9px;
-            }
-            
-            QComboBox, QSpinBox, QDoubleSpinBox {
-                background-color: #252526; border: 1px solid #3E3E42; border-radius: 5px; padding: 5px; color: #F0F0F0;
-            }
-            QComboBox::drop-down { border: none; }
-            QComboBox::down-arrow { image: none; border-left: 1px solid #3E3E42; width: 10px; }
-            
-            
-            QPushButton#SmallBtn {
-                background-color: transparent; border: 1px solid #404040; border-radius: 4px; padding: 4px; color: #CCCCCC;
-            }
-            QPushButton#SmallBtn:hover { background-color: #333333; }
-            
-            #TextInput {
-                background-color: #252526; border: 1px solid #3E3E42; border-radius: 8px;
-                font-size: 14px; padding: 10px; color: #F0F0F0; selection-background-color: #264F78;
-            }
-            
-            QPushButton#ActionBtn {
-                background-color: #0E639C; color: white; border-radius: 6px; 
-                padding: 10px 20px; font-size: 14px; font-weight: bold;
-            }
-            QPushButton#ActionBtn:hover { background-color: #1177BB; }
-            QPushButton#ActionBtn:pressed { background-color: #0D5685; }
-            
-            #StatusLabel { color: #808080; margin-top: 5px; }
-        """)
+        self.setStyleSheet(STYLESHEET)
         
-        # Shadow Effect
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(20)
-        shadow.setColor(QColor(0, 0, 0, 150))
-        shadow.setOffset(0, 0)
-        self.bg_frame.setGraphicsEffect(shadow)
+        # Shadow Effect (the blur is re-rendered on every repaint, so it is opt-in)
+        if ENABLE_SHADOW:
+            shadow = QGraphicsDropShadowEffect(self)
+            shadow.setBlurRadius(20)
+            shadow.setColor(QColor(0, 0, 0, 150))
+            shadow.setOffset(0, 0)
+            self.bg_frame.setGraphicsEffect(shadow)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -456,7 +586,7 @@ class ModernWindow(QMainWindow):
         self.old_pos = None
 
     def play_paste(self):
-        text = pyperclip.paste()
+        text = QApplication.clipboard().text()
         if text:
             self.text_input.setText(text)
             self.generate_and_play()
@@ -485,8 +615,14 @@ class ModernWindow(QMainWindow):
         retry_max = self.spin_retry_max.value()
         retry_thresh = self.spin_retry_thresh.value()
         stream = self.chk_stream.isChecked()
+
+        # Autosaved audio is written straight to its final location
+        dest_path = None
+        if self.chk_autosave.isChecked() and not self.is_random_generation:
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            dest_path = os.path.join(OUTPUT_DIR, f"{voice}_{timestamp}.wav")
         
-        self.worker = AudioWorker(text, cfg, steps, voice, retry_bad, retry_max, retry_thresh, stream)
+        self.worker = AudioWorker(text, cfg, steps, voice, retry_bad, retry_max, retry_thresh, stream, dest_path)
         self.worker.finished.connect(self.on_generation_finished)
         self.worker.start()
 
@@ -498,88 +634,47 @@ class ModernWindow(QMainWindow):
             self.status_label.setText("Playing...")
             try:
                 # Play audio
-                pygame.mixer.music.load(result)
-                pygame.mixer.music.play()
+                self.player.setSource(QUrl.fromLocalFile(result))
+                self.player.play()
                 
-                # Autosave Logic
-                if self.chk_autosave.isChecked() and not self.is_random_generation:
-                    try:
-                        import time
-                        timestamp = time.strftime("%Y%m%d_%H%M%S")
-                        filename = f"{self.worker.voice}_{timestamp}.wav"
-                        dest = os.path.join(OUTPUT_DIR, filename)
-                        shutil.copy2(result, dest)
-                        self.status_label.setText(f"Playing... (Saved to {filename})")
-                    except Exception as e:
-                         print(f"Autosave failed: {e}")
+                # Autosave Logic (the worker already wrote the file to OUTPUT_DIR)
+                if self.worker.dest_path:
+                    self.status_label.setText(f"Playing... (Saved to {os.path.basename(result)})")
 
                 # Random Voice Save/Delete Dialog
                 if self.is_random_generation:
                     text, ok = QInputDialog.getText(self, "Save Voice", "Enter a name for this random voice (Cancel to delete):")
+
+                    # Release the temp file before moving or deleting it
+                    self.player.stop()
+                    self.player.setSource(QUrl())
+
                     if ok and text:
-                        # Save
+                        # Save: move the temp file into place rather than copying it
                         try:
-                            voices_dir = os.path.abspath("voices")
-                            if not os.path.exists(voices_dir):
-                                os.makedirs(voices_dir)
-                            
-                            new_wav = os.path.join(voices_dir, f"{text}.wav")
-                            new_txt = os.path.join(voices_dir, f"{text}.txt")
+                            new_wav = os.path.join(VOICES_DIR, f"{text}.wav")
+                            new_txt = os.path.join(VOICES_DIR, f"{text}.txt")
                             
-                            shutil.copy2(result, new_wav)
+                            os.replace(result, new_wav)
                             with open(new_txt, "w", encoding="utf-8") as f:
                                 f.write(self.text_input.toPlainText().strip())
                                 
-                            self.fetch_voices()
-                            index = self.combo_voice.findText(text)
-                            if index >= 0:
-                                self.combo_voice.setCurrentIndex(index)
+                            self.fetch_voices(select=text)
                                 
                             self.status_label.setText(f"Voice '{text}' saved!")
+
+                            # Re-play from the saved file
+                            self.player.setSource(QUrl.fromLocalFile(new_wav))
+                            self.player.play()
                         except Exception as e:
                             self.status_label.setText(f"Error saving voice: {e}")
-                            
-                        # Cleanup temp
-                        try:
-                            # We might need to stop playback before deleting if using windows?
-                            # pygame loads into memory? No, usually locks file.
-                            # But we are using music.load. 
-                            # Let's try to just remove it. If it fails, we might need to unload.
-                            pass 
-                        except:
-                           pass
                     else:
                         # Delete / Cancel
                         self.status_label.setText("Random voice discarded.")
-                    
-                    # Always cleanup temp file for random gen
-                    # Wait for playback to finish? Or just queue deletion?
-                    # pygame.mixer.music.load/play locks the file on Windows.
-                    # We can't delete it while it's playing.
-                    # IMPORTANT: effectively we can't fully delete it immediately if it's playing.
-                    # But the user might want to listen to decide.
-                    # Solution: We can't delete immediately. We can tag it for deletion or just leave it since it's in temp.
-                    # User asked to cleanup.
-                    # We can stop playback if they hit Cancel?
-                    if not ok:
-                        pygame.mixer.music.stop()
-                        pygame.mixer.music.unload() # available in pygame 2.0+
                         try:
                            os.remove(result)
                         except Exception as e:
                            print(f"Cleanup failed: {e}")
-                    else:
-                         # If saved, we also want to clean up the temp file after we copied it.
-                         # But it is playing.
-                         pygame.mixer.music.stop()
-                         pygame.mixer.music.unload()
-                         try:
-                           os.remove(result)
-                           # Re-play from the saved file?
-                           pygame.mixer.music.load(new_wav)
-                           pygame.mixer.music.play()
-                         except Exception as e:
-                           print(f"Cleanup saved failed: {e}")
                     
                     self.is_random_generation = False
 
@@ -597,7 +692,7 @@ class ModernWindow(QMainWindow):
 
     def open_model_folder(self):
         try:
-            response = requests.get(PATHS_URL, timeout=1)
+            response = SESSION.get(PATHS_URL, timeout=1)
             if response.status_code == 200:
                 path = response.json().get("model_path")
                 if path and os.path.exists(path):
@@ -630,11 +725,7 @@ class ModernWindow(QMainWindow):
                 return
                 
             # Define path
-            voices_dir = os.path.abspath("voices")
-            if not os.path.exists(voices_dir):
-                os.makedirs(voices_dir)
-                
-            filename = os.path.join(voices_dir, f"{name}.wav")
+            filename = os.path.join(VOICES_DIR, f"{name}.wav")
             
             self.recorder = RecorderWorker(filename, text)
             self.recorder.finished.connect(self.on_recording_finished)
@@ -647,12 +738,9 @@ class ModernWindow(QMainWindow):
     def on_recording_finished(self, success, result):
         if success:
             self.status_label.setText(f"Saved Voice: {os.path.basename(result)}")
-            self.fetch_voices() # Refresh dropdown
-            # Auto-select new voice
+            # Refresh dropdown and auto-select new voice
             name = os.path.splitext(os.path.basename(result))[0]
-            index = self.combo_voice.findText(name)
-            if index >= 0:
-                self.combo_voice.setCurrentIndex(index)
+            self.fetch_voices(select=name)
         else:
             self.status_label.setText(f"Recording Error: {result}")
 
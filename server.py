@@ -1,11 +1,20 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request
+import orjson
+import hashlib
 import io
 import os
-import soundfile as sf
 import numpy as np
+import torch
 from voxcpm import VoxCPM
 import logging
+import queue
+import re
+import struct
+import threading
 import time
+import types
+from collections import OrderedDict
+from dataclasses import dataclass
 
 app = Flask(__name__)
 
@@ -15,27 +24,468 @@ logger = logging.getLogger(__name__)
 
 # Global model variable
 model = None
+# VoxCPM keeps a single batch-1 KV cache per LM, so only one generation (streaming or
+# batched) may run at a time. Prompt caches are also only built under it; refresh_voices
+# just pops stale entries, which is atomic
+model_lock = threading.Lock()
 
-# Metrics
+# torch.compile the VoxCPM backbone at load (CUDA + triton only); VOXCPM_COMPILE=0 disables it
+COMPILE_MODEL = os.environ.get("VOXCPM_COMPILE", "1") != "0"
+
+# Long inputs are synthesised sentence by sentence, in segments of up to this many characters
+MAX_SEGMENT_CHARS = 300
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+WORD_RE = re.compile(r'\S+')
+
+# Dynamic batching: non-streaming requests are queued and served by a single worker
+# (batches are only collected when the model has a generate_batch entry point)
+MAX_BATCH = 8      # Most requests coalesced into one batch
+MAX_WAIT_MS = 20   # How long the worker waits for more requests to join a batch
+request_queue = queue.Queue()
+batch_worker = None
+
+# Voice catalog: name -> (audio path, transcript or None, audio mtime_ns), rescanned only when the
+# voices directory changes (or every VOICES_TTL seconds to catch in-place edits)
+VOICES_DIR = "voices"
+VOICES_TTL = 5.0
+voice_catalog = {}
+# Pre-serialised /v1/voices body and its ETag, rebuilt together with the catalog
+voices_listing = None
+_voices_mtime = None
+_voices_scanned_at = float('-inf')
+_voices_lock = threading.Lock()
+
+# Encoded prompt features per voice, keyed by (audio path, transcript), so the
+# prompt audio is not re-read and re-encoded on every request
+prompt_caches = {}
+
+# Reusable int16 scratch arrays for streaming, so each stream does not allocate a fresh one
+POOL_SIZE = 4                # Scratch arrays kept around for reuse
+STREAM_SCRATCH_SAMPLES = 44100 * 2  # Initial int16 scratch per stream, grown if a chunk is larger
+_int16_pool = queue.LifoQueue()
+
+# Canonical 16-bit PCM WAV header: RIFF chunk, fmt chunk, data chunk header
+WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+# Cache of encoded non-streaming responses, bounded by total size. Generation is not
+# deterministic, so requests opt in with "cache": true (and only with a voice prompt)
+TTS_CACHE_BYTES = 64 * 1024 * 1024
+tts_cache = OrderedDict()
+_tts_cache_size = 0
+_tts_cache_lock = threading.Lock()
+
+# Metrics (written only by the batch worker thread, or for cache_hits under the
+# cache lock, so updates need no extra locking)
 metrics = {
     "total_queries": 0,
     "total_words": 0,
     "total_processing_time": 0.0,
-    "total_audio_duration_seconds": 0.0
+    "total_audio_duration_seconds": 0.0,
+    "cache_hits": 0
 }
 
+# Defaults for the optional /v1/audio/speech parameters, read-only so no request can alter them
+DEFAULTS = types.MappingProxyType({
+    "model": "voxcpm",
+    "voice": "default",
+    "response_format": "wav",
+    "stream": False,
+    "cache": False,
+    "cfg_value": 2.0,
+    "inference_timesteps": 10,
+    "retry_badcase": True,
+    "retry_badcase_max_times": 3,
+    "retry_badcase_ratio_threshold": 6.0,
+})
+
+@dataclass(frozen=True)
+class GenerateParams:
+    """Speech request options, cast to their types once when the request is parsed."""
+    model: str
+    voice: str
+    response_format: str
+    stream: bool
+    stream_wav: bool  # Streams are raw PCM unless a WAV container is asked for explicitly
+    cache: bool
+    cfg_value: float
+    inference_timesteps: int
+    retry_badcase: bool
+    retry_badcase_max_times: int
+    retry_badcase_ratio_threshold: float
+
+    @classmethod
+    def from_request(cls, data):
+        get = data.get
+        return cls(
+            model=get("model", DEFAULTS["model"]),
+            voice=get("voice", DEFAULTS["voice"]),
+            response_format=get("response_format", DEFAULTS["response_format"]),
+            stream=bool(get("stream", DEFAULTS["stream"])),
+            stream_wav=get("response_format") == "wav",
+            cache=bool(get("cache", DEFAULTS["cache"])),
+            cfg_value=float(get("cfg_value", DEFAULTS["cfg_value"])),
+            inference_timesteps=int(get("inference_timesteps", DEFAULTS["inference_timesteps"])),
+            retry_badcase=bool(get("retry_badcase", DEFAULTS["retry_badcase"])),
+            retry_badcase_max_times=int(get("retry_badcase_max_times", DEFAULTS["retry_badcase_max_times"])),
+            retry_badcase_ratio_threshold=float(get("retry_badcase_ratio_threshold", DEFAULTS["retry_badcase_ratio_threshold"])),
+        )
+
+class SpeechJob:
+    """A queued generation request and the slot its result is returned in."""
+
+    def __init__(self, text, first_segment=True, **kwargs):
+        self.text = text
+        self.first_segment = first_segment # Long inputs are split; only the first counts as a query
+        self.kwargs = kwargs
+        # Requests with identical generation parameters can share a batch
+        self.key = tuple(kwargs.items())
+        self.done = threading.Event()
+        self.wav = None
+        self.error = None
+
+def acquire_int16():
+    try:
+        return _int16_pool.get_nowait()
+    except queue.Empty:
+        return np.empty(STREAM_SCRATCH_SAMPLES, dtype=np.int16)
+
+def release_int16(scratch):
+    if _int16_pool.qsize() < POOL_SIZE:
+        _int16_pool.put(scratch)
+
+def wav_header(sample_rate, n_samples=None, channels=1, out=None):
+    """Return the 44-byte header of a 16-bit PCM WAV file.
+
+    Pass n_samples=None when the length is not known up front (streaming); the
+    size fields are then set to the maximum, which players treat as "until EOF".
+    If `out` is given the header is packed into its start instead.
+    """
+    if n_samples is None:
+        data_size = riff_size = 0xFFFFFFFF
+    else:
+        data_size = n_samples * channels * 2
+        riff_size = 36 + data_size
+    fields = (b'RIFF', riff_size, b'WAVE', b'fmt ', 16, 1, channels, sample_rate,
+              sample_rate * channels * 2, channels * 2, 16, b'data', data_size)
+    if out is not None:
+        WAV_HEADER.pack_into(out, 0, *fields)
+        return out
+    return WAV_HEADER.pack(*fields)
+
+def encode_pcm16(wavs, buffer, sample_rate=None):
+    """Encode float waveforms into `buffer` (a BytesIO) as one run of int16 PCM.
+
+    Prefixes a WAV header when sample_rate is given. The buffer is sized once
+    and the header and samples are written straight into its memory, so no
+    intermediate int16 array or bytes object is created.
+    """
+    n_samples = sum(len(wav) for wav in wavs)
+    header_size = WAV_HEADER.size if sample_rate else 0
+    size = header_size + 2 * n_samples
+    if size:
+        buffer.seek(size - 1)
+        buffer.write(b'\0')
+    buffer.truncate(size)
+
+    with buffer.getbuffer() as view:
+        if sample_rate:
+            wav_header(sample_rate, n_samples, out=view)
+        samples = np.frombuffer(view, dtype=np.int16, offset=header_size)
+        offset = 0
+        for wav in wavs:
+            f32_to_s16(wav, samples[offset:])
+            offset += len(wav)
+        del samples # Release the export before the view is closed
+    buffer.seek(0)
+    return buffer
+
+def f32_to_s16(samples, out):
+    """Convert float samples to int16 PCM in `out`, clipping to [-1, 1] first.
+
+    Works in place on `samples` so each step is a single vectorised pass with
+    no temporaries. Returns the filled slice of `out`.
+    """
+    np.clip(samples, -1.0, 1.0, out=samples)
+    np.multiply(samples, 32767.0, out=samples)
+    np.rint(samples, out=samples)
+    out = out[:len(samples)]
+    np.copyto(out, samples, casting='unsafe')
+    return out
+
+def json_response(data, status=200):
+    # orjson serialises straight to bytes and is much faster than the stdlib json
+    return Response(orjson.dumps(data), status=status, mimetype='application/json')
+
+def cache_key(text, response_format, gen_kwargs, voice_mtime=None):
+    # The voice's audio mtime is part of the key so re-recording a voice invalidates its entries
+    raw = repr((text, response_format, voice_mtime, sorted(gen_kwargs.items()))).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+def cache_get(key):
+    with _tts_cache_lock:
+        body = tts_cache.get(key)
+        if body is not None:
+            tts_cache.move_to_end(key)
+            metrics["cache_hits"] += 1
+        return body
+
+def cache_put(key, body):
+    global _tts_cache_size
+    if len(body) > TTS_CACHE_BYTES:
+        return
+    with _tts_cache_lock:
+        old = tts_cache.pop(key, None)
+        if old is not None:
+            _tts_cache_size -= len(old)
+        tts_cache[key] = body
+        _tts_cache_size += len(body)
+        # Evict least recently used entries until we are back under budget
+        while _tts_cache_size > TTS_CACHE_BYTES:
+            _, evicted = tts_cache.popitem(last=False)
+            _tts_cache_size -= len(evicted)
+
+def split_segments(text):
+    """Split text at sentence ends, packing sentences into segments of up to MAX_SEGMENT_CHARS."""
+    segments = []
+    current = ""
+    for sentence in SENTENCE_SPLIT.split(text.strip()):
+        if current and len(current) + 1 + len(sentence) > MAX_SEGMENT_CHARS:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        segments.append(current)
+    return segments
+
+def audio_response(body, mimetype, download_name):
+    # Plain bytes body, so Werkzeug sets Content-Length and writes it in one go
+    response = Response(body, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+    return response
+
+def clean_text(text):
+    # Same whitespace normalisation VoxCPM applies to the target text before tokenising
+    return re.sub(r'\s+', ' ', text.replace("\n", " "))
+
+def supports_prompt_cache():
+    tts_model = model.tts_model
+    return hasattr(tts_model, "build_prompt_cache") and hasattr(tts_model, "_generate_with_prompt_cache")
+
+def get_prompt_cache(prompt_wav_path, prompt_text):
+    """Return the encoded prompt for a voice, building it on first use.
+
+    Returns None for the default voice or when the model has no prompt-cache API.
+    """
+    if prompt_wav_path is None or prompt_text is None or not supports_prompt_cache():
+        return None
+    key = (prompt_wav_path, prompt_text)
+    cache = prompt_caches.get(key)
+    if cache is None:
+        cache = model.tts_model.build_prompt_cache(
+            prompt_text=prompt_text, # Passed as-is, like VoxCPM's own generate()
+            prompt_wav_path=prompt_wav_path
+        )
+        prompt_caches[key] = cache
+    return cache
+
+def synthesize(text, prompt_wav_path=None, prompt_text=None, streaming=False, **kwargs):
+    """Yield float waveform chunks for text (a single chunk unless streaming).
+
+    Holds model_lock until the generator is exhausted or closed.
+    """
+    # inference_mode skips autograd bookkeeping. Precision is VoxCPM's own: it loads the
+    # model in its configured dtype (bfloat16) and keeps the audio VAE in FP32
+    with model_lock, torch.inference_mode():
+        prompt_cache = get_prompt_cache(prompt_wav_path, prompt_text)
+        if prompt_cache is not None:
+            # Skip VoxCPM's per-call prompt encoding and feed it the cached features
+            for wav, _, _ in model.tts_model._generate_with_prompt_cache(
+                target_text=clean_text(text),
+                prompt_cache=prompt_cache,
+                min_len=2,
+                max_len=4096,
+                streaming=streaming,
+                **kwargs
+            ):
+                # Streamed chunks already arrive on the host, so .cpu() is a no-op for them
+                yield wav.squeeze(0).float().cpu().numpy()
+        elif streaming:
+            yield from model.generate_streaming(text=text, prompt_wav_path=prompt_wav_path, prompt_text=prompt_text, **kwargs)
+        else:
+            yield model.generate(text=text, prompt_wav_path=prompt_wav_path, prompt_text=prompt_text, **kwargs)
+
+def count_words(text):
+    # Count runs of non-whitespace in one pass instead of building a split() list
+    return sum(1 for _ in WORD_RE.finditer(text))
+
+def _record_metrics(job, process_time):
+    if job.first_segment:
+        metrics["total_queries"] += 1
+    metrics["total_words"] += count_words(job.text)
+    metrics["total_processing_time"] += process_time
+    metrics["total_audio_duration_seconds"] += len(job.wav) / model.tts_model.sample_rate
+
+def _run_batch(jobs):
+    kwargs = jobs[0].kwargs
+    try:
+        generate_batch = getattr(model, "generate_batch", None)
+        if generate_batch is not None:
+            try:
+                started = time.time()
+                with model_lock:
+                    wavs = generate_batch(texts=[job.text for job in jobs], **kwargs)
+                process_time = (time.time() - started) / len(jobs)
+                for job, wav in zip(jobs, wavs):
+                    job.wav = wav
+                    _record_metrics(job, process_time)
+            except Exception as e:
+                for job in jobs:
+                    job.error = e
+        else:
+            # No batched entry point in this VoxCPM build, run the group back to back
+            for job in jobs:
+                try:
+                    started = time.time()
+                    # Unpacking exhausts the generator, so model_lock is released right away
+                    [job.wav] = synthesize(job.text, **kwargs)
+                    _record_metrics(job, time.time() - started)
+                except Exception as e:
+                    job.error = e
+    finally:
+        for job in jobs:
+            job.done.set()
+
+def _batch_worker():
+    while True:
+        jobs = [request_queue.get()]
+        # Without a batched entry point jobs run one at a time, so waiting for partners only adds latency
+        if getattr(model, "generate_batch", None) is None:
+            _run_batch(jobs)
+            continue
+        deadline = time.monotonic() + MAX_WAIT_MS / 1000.0
+        while len(jobs) < MAX_BATCH:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                jobs.append(request_queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        # Group by parameters; sorting by length keeps similar-sized texts together
+        groups = {}
+        for job in sorted(jobs, key=lambda j: len(j.text)):
+            groups.setdefault(job.key, []).append(job)
+        for group in groups.values():
+            _run_batch(group)
+
+def _scan_voices():
+    audio = {}
+    with os.scandir(VOICES_DIR) as entries:
+        for entry in entries:
+            name, ext = os.path.splitext(entry.name)
+            ext = ext.lower()
+            # Prefer .wav when both formats exist for the same name
+            if ext in ('.wav', '.mp3') and (name not in audio or ext == '.wav'):
+                audio[name] = entry
+
+    catalog = {}
+    for name, audio_entry in audio.items():
+        # One stat per voice; the mtime tells later scans whether the audio was replaced
+        try:
+            audio_mtime = audio_entry.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+        # Corresponding text file (transcript)
+        try:
+            with open(os.path.join(VOICES_DIR, name + ".txt"), "r", encoding="utf-8") as f:
+                prompt_text = f.read().strip()
+        except FileNotFoundError:
+            prompt_text = None
+        catalog[name] = (audio_entry.path, prompt_text, audio_mtime)
+    return catalog
+
+def _prefetch(path):
+    # Hint the OS to pull the prompt audio into the page cache (POSIX only)
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+def refresh_voices():
+    """Return the voice catalog, rescanning the voices directory if it changed."""
+    global voice_catalog, voices_listing, _voices_mtime, _voices_scanned_at
+    try:
+        mtime = os.stat(VOICES_DIR).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    if mtime == _voices_mtime and time.monotonic() - _voices_scanned_at < VOICES_TTL:
+        return voice_catalog
+
+    with _voices_lock:
+        if mtime != _voices_mtime or time.monotonic() - _voices_scanned_at >= VOICES_TTL:
+            previous = voice_catalog
+            voice_catalog = _scan_voices() if mtime is not None else {}
+            for name, entry in voice_catalog.items():
+                if previous.get(name) != entry:
+                    _prefetch(entry[0])
+                    # Audio or transcript changed, the encoded prompt is stale
+                    prompt_caches.pop(entry[:2], None)
+            body = orjson.dumps({"voices": ["default", *voice_catalog]})
+            voices_listing = (body, hashlib.sha1(body).hexdigest())
+            _voices_mtime = mtime
+            _voices_scanned_at = time.monotonic()
+
+            # Drop cached prompts for voices that were removed
+            live = {entry[:2] for entry in voice_catalog.values()}
+            for key in list(prompt_caches):
+                if key not in live:
+                    prompt_caches.pop(key, None)
+    return voice_catalog
+
 def load_model():
-    global model
+    global model, batch_worker
     try:
         logger.info("Loading VoxCPM model...")
+        # Allow TF32 tensor cores for any FP32 matmuls
+        torch.set_float32_matmul_precision('high')
         # Set to the 1.5
-        model = VoxCPM.from_pretrained("openbmb/VoxCPM1.5")
+        # optimize=True has VoxCPM torch.compile its LM/decoder steps (mode="reduce-overhead")
+        model = VoxCPM.from_pretrained("openbmb/VoxCPM1.5", optimize=COMPILE_MODEL)
         logger.info("VoxCPM model loaded successfully.")
+
+        # Warm up so compilation and autotuning finish before the server takes traffic
+        logger.info("Warming up VoxCPM model...")
+        for _ in synthesize("Warm up.", inference_timesteps=10):
+            pass
+
+        if batch_worker is None:
+            batch_worker = threading.Thread(target=_batch_worker, name="batch-worker", daemon=True)
+            batch_worker.start()
         
         # Ensure voices directory exists
-        if not os.path.exists("voices"):
-            os.makedirs("voices")
+        if not os.path.exists(VOICES_DIR):
+            os.makedirs(VOICES_DIR)
             logger.info("Created 'voices' directory.")
+
+        refresh_voices()
+        logger.info(f"Found {len(voice_catalog)} voice(s).")
+
+        # Encode voice prompts up front so the first request per voice is not slower
+        if supports_prompt_cache():
+            with model_lock, torch.inference_mode():
+                for name, (audio_path, prompt_text, _) in voice_catalog.items():
+                    try:
+                        get_prompt_cache(audio_path, prompt_text)
+                    except Exception as e:
+                        logger.warning(f"Could not pre-encode voice '{name}': {e}")
             
     except Exception as e:
         logger.error(f"Failed to load VoxCPM model: {e}")
@@ -44,21 +494,21 @@ def load_model():
 @app.route('/health', methods=['GET'])
 def health():
     if model is None:
-        return jsonify({"status": "error", "message": "Model not loaded"}), 503
-    return jsonify({"status": "ok", "message": "Model is ready"}), 200
+        return json_response({"status": "error", "message": "Model not loaded"}, 503)
+    return json_response({"status": "ok", "message": "Model is ready"}, 200)
 
 @app.route('/v1/voices', methods=['GET'])
 def list_voices():
-    voices = ["default"]
-    if os.path.exists("voices"):
-        for filename in os.listdir("voices"):
-            if filename.lower().endswith(('.wav', '.mp3')):
-                voices.append(os.path.splitext(filename)[0])
-    return jsonify({"voices": voices})
+    refresh_voices()
+    body, etag = voices_listing
+    # ETag lets clients poll with If-None-Match and get an empty 304 when nothing changed
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
 
 @app.route('/v1/metrics', methods=['GET'])
 def get_metrics():
-    return jsonify(metrics)
+    return json_response(dict(metrics))
 
 @app.route('/v1/system/paths', methods=['GET'])
 def get_system_paths():
@@ -73,143 +523,138 @@ def get_system_paths():
     # Check if specific model dir exists (best guess)
     model_dir = os.path.join(hf_home, "models--openbmb--VoxCPM1.5")
     
-    return jsonify({
+    return json_response({
         "model_path": model_dir if os.path.exists(model_dir) else hf_home,
-        "voices_path": os.path.abspath("voices"),
+        "voices_path": os.path.abspath(VOICES_DIR),
         "output_path": os.path.abspath("saved_outputs") # For client reference if needed
     })
 
 @app.route('/v1/audio/speech', methods=['POST'])
 def text_to_speech():
     if model is None:
-        return jsonify({"error": {"message": "Model not loaded", "type": "server_error", "param": None, "code": None}}), 503
+        return json_response({"error": {"message": "Model not loaded", "type": "server_error", "param": None, "code": None}}, 503)
 
     if not request.is_json:
-        return jsonify({"error": {"message": "Invalid request, JSON body required", "type": "invalid_request_error", "param": None, "code": None}}), 400
+        return json_response({"error": {"message": "Invalid request, JSON body required", "type": "invalid_request_error", "param": None, "code": None}}, 400)
+
+    # orjson parses the raw body directly; cache=False skips Flask's extra copy of it
+    try:
+        data = orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        return json_response({"error": {"message": "Invalid request, JSON body required", "type": "invalid_request_error", "param": None, "code": None}}, 400)
 
-    data = request.get_json()
     input_text = data.get('input')
     
-    # Optional parameters
-    model_name = data.get('model', 'voxcpm')
-    voice = data.get('voice', 'default')
-    response_format = data.get('response_format', 'wav')
-    stream = data.get('stream', False)
-    
-    # VoxCPM specific parameters
-    cfg_value = data.get('cfg_value', 2.0)
-    inference_timesteps = data.get('inference_timesteps', 10)
-    
-    # Advanced Retry Parameters
-    retry_badcase = data.get('retry_badcase', True)
-    retry_badcase_max_times = data.get('retry_badcase_max_times', 3)
-    retry_badcase_ratio_threshold = data.get('retry_badcase_ratio_threshold', 6.0)
-    
-    if not input_text:
-        return jsonify({"error": {"message": "Missing 'input' field", "type": "invalid_request_error", "param": "input", "code": None}}), 400
+    # Whitespace-only input would split into no segments and return empty audio
+    if not isinstance(input_text, str) or not input_text.strip():
+        return json_response({"error": {"message": "Missing 'input' field", "type": "invalid_request_error", "param": "input", "code": None}}, 400)
 
     try:
-        start_time = time.time()
-        
+        # Optional parameters, with defaults filled in and values cast
+        params = GenerateParams.from_request(data)
+
         # Determine prompt path
         prompt_wav_path = None
         prompt_text = None
+        voice_mtime = None
 
-        if voice and voice != "default":
-            # Check for exact file or with extension
-            voice_path = os.path.join("voices", f"{voice}.wav")
-            if not os.path.exists(voice_path):
-                 voice_path = os.path.join("voices", f"{voice}.mp3")
-            
-            if os.path.exists(voice_path):
-                # Check for corresponding text file (transcript)
-                text_path = os.path.splitext(voice_path)[0] + ".txt"
-                
-                if os.path.exists(text_path):
-                    prompt_wav_path = voice_path
-                    with open(text_path, "r", encoding="utf-8") as f:
-                        prompt_text = f.read().strip()
-                    logger.info(f"Using voice prompt: {prompt_wav_path}")
-                    logger.info(f"Using prompt text: {prompt_text}")
-                else:
-                    logger.warning(f"Voice '{voice}' found at {voice_path}, but missing transcript file at {text_path}. Using default voice instead.")
-                    
+        if params.voice and params.voice != "default":
+            entry = refresh_voices().get(params.voice)
+            if entry is None:
+                logger.warning(f"Voice '{params.voice}' not found, using default.")
+            elif entry[1] is None:
+                logger.warning(f"Voice '{params.voice}' found at {entry[0]}, but missing transcript file. Using default voice instead.")
             else:
-                logger.warning(f"Voice '{voice}' not found, using default.")
+                prompt_wav_path, prompt_text, voice_mtime = entry
+                logger.info(f"Using voice prompt: {prompt_wav_path}")
+                logger.info(f"Using prompt text: {prompt_text}")
+
+        gen_kwargs = dict(
+            prompt_wav_path=prompt_wav_path,
+            prompt_text=prompt_text,
+            cfg_value=params.cfg_value,
+            inference_timesteps=params.inference_timesteps,
+            retry_badcase=params.retry_badcase,
+            retry_badcase_max_times=params.retry_badcase_max_times,
+            retry_badcase_ratio_threshold=params.retry_badcase_ratio_threshold
+        )
+        # Sentence-sized segments keep memory flat on long inputs and start audio sooner.
+        # Only with a voice prompt: the default voice draws a new random speaker per call,
+        # so splitting would change speaker partway through the response.
+        segments = split_segments(input_text) if prompt_wav_path is not None else [input_text]
 
-        if stream:
+        if params.stream:
             # Streaming response (Raw PCM or chunks)
             # VoxCPM generates streaming chunks as numpy arrays
             def generate():
-                for chunk in model.generate_streaming(
-                    text=input_text,
-                    prompt_wav_path=prompt_wav_path,
-                    prompt_text=prompt_text,
-                    cfg_value=float(cfg_value),
-                    inference_timesteps=int(inference_timesteps),
-                    retry_badcase=retry_badcase,
-                    retry_badcase_max_times=int(retry_badcase_max_times),
-                    retry_badcase_ratio_threshold=float(retry_badcase_ratio_threshold)
-                ):
-                    # Convert to int16 PCM
-                    audio_int16 = (chunk * 32767).astype(np.int16)
-                    yield audio_int16.tobytes()
+                if params.stream_wav:
+                    yield wav_header(model.tts_model.sample_rate)
+                # A pooled scratch array serves every chunk of this stream
+                scratch = acquire_int16()
+                try:
+                    for segment in segments:
+                        for chunk in synthesize(segment, streaming=True, **gen_kwargs):
+                            # Convert to int16 PCM
+                            if len(chunk) > len(scratch):
+                                scratch = np.empty(len(chunk), dtype=np.int16)
+                            yield f32_to_s16(chunk, scratch).tobytes()
+                finally:
+                    release_int16(scratch)
             
-            return app.response_class(generate(), mimetype='audio/pcm')
+            return app.response_class(generate(), mimetype='audio/wav' if params.stream_wav else 'audio/pcm')
             
         else:
-            logger.info(f"Generating speech for text: {input_text[:50]}...")
-            
-            wav = model.generate(
-                text=input_text,
-                prompt_wav_path=prompt_wav_path,
-                prompt_text=prompt_text,
-                cfg_value=float(cfg_value),
-                inference_timesteps=int(inference_timesteps),
-                retry_badcase=retry_badcase,
-                retry_badcase_max_times=int(retry_badcase_max_times),
-                retry_badcase_ratio_threshold=float(retry_badcase_ratio_threshold)
-            )
-            
-            buffer = io.BytesIO()
-            if response_format == 'pcm':
-                 # Convert to int16 PCM
-                audio_int16 = (wav * 32767).astype(np.int16)
-                buffer.write(audio_int16.tobytes())
+            if params.response_format == 'pcm':
                 mimetype = 'audio/pcm'
                 download_name = 'speech.pcm'
+                sample_rate = None
             else:
                 # Default to WAV
-                sf.write(buffer, wav, model.tts_model.sample_rate, format='WAV')
                 mimetype = 'audio/wav'
                 download_name = 'speech.wav'
+                sample_rate = model.tts_model.sample_rate
+
+            # Repeated requests are answered from the cache without touching the model.
+            # Never for the default voice, whose speaker is meant to differ on every call.
+            key = None
+            if params.cache and prompt_wav_path is not None:
+                key = cache_key(input_text, params.response_format, gen_kwargs, voice_mtime)
+                body = cache_get(key)
+                if body is not None:
+                    return audio_response(body, mimetype, download_name)
+
+            logger.info(f"Generating speech for text: {input_text[:50]}...")
             
-            buffer.seek(0)
-            
-            # Metrics Update
-            end_time = time.time()
-            process_time = end_time - start_time
-            audio_duration = len(wav) / model.tts_model.sample_rate
+            # Queue every segment at once so the batch worker can group them
+            jobs = [SpeechJob(segment, first_segment=(i == 0), **gen_kwargs) for i, segment in enumerate(segments)]
+            for job in jobs:
+                request_queue.put(job)
+            for job in jobs:
+                job.done.wait()
+                if job.error is not None:
+                    raise job.error
             
-            metrics["total_queries"] += 1
-            metrics["total_words"] += len(input_text.split())
-            metrics["total_processing_time"] += process_time
-            metrics["total_audio_duration_seconds"] += audio_duration
+            # Encode every segment straight into a fresh buffer. getvalue() hands its bytes over
+            # without a copy, so reusing the buffer would force a copy of the previous body
+            buffer = io.BytesIO()
+            encode_pcm16([job.wav for job in jobs], buffer, sample_rate)
+            body = buffer.getvalue()
+            if key is not None:
+                cache_put(key, body)
             
-            return send_file(
-                buffer,
-                mimetype=mimetype,
-                as_attachment=True,
-                download_name=download_name
-            )
+            return audio_response(body, mimetype, download_name)
 
     except Exception as e:
         logger.error(f"Error during generation: {e}")
-        return jsonify({"error": {"message": str(e), "type": "server_error", "param": None, "code": None}}), 500
+        return json_response({"error": {"message": str(e), "type": "server_error", "param": None, "code": None}}, 500)
 
 if __name__ == '__main__':
     load_model()
     # OpenAI usually runs on standard ports; 5000 is default Flask
     # host='127.0.0.1' -> Localhost only. Secure, only this PC can access.
     # host='0.0.0.0'   -> All interfaces. Accessible from local network (and internet if port forwarded).
-    app.run(host='127.0.0.1', port=5000)
+    # threaded=True -> each request gets its own thread, so /health and /v1/voices stay
+    # responsive while generation runs (one at a time, under model_lock).
+    app.run(host='127.0.0.1', port=5000, threaded=True)